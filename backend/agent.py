@@ -1,5 +1,6 @@
 # agent.py
-import os, asyncio
+import os, asyncio, time
+from collections import OrderedDict
 from dotenv import load_dotenv
 from langchain.agents import Tool, initialize_agent, AgentType
 from langchain_google_genai import ChatGoogleGenerativeAI
@@ -28,7 +29,9 @@ from tools import (
     weather_fronts_tool,
     comprehensive_weather_analysis_tool,
     balloons_by_country_tool,
-    balloons_in_specific_country_tool
+    balloons_in_specific_country_tool,
+    SNAPSHOT_TTL,
+    balloon_store
 )
 
 load_dotenv()
@@ -53,97 +56,116 @@ else:
 balloon_tools = [
     Tool(
         name="highest_balloon",
-        func=lambda *args, **kwargs: asyncio.run(highest_balloon_tool()),
+        func=None,
+        coroutine=lambda *args, **kwargs: highest_balloon_tool(),
         description="Get the balloon with the highest altitude globally. Returns enriched info with country."
     ),
     Tool(
         name="average_altitude",
-        func=lambda *args, **kwargs: asyncio.run(average_altitude_tool()),
+        func=None,
+        coroutine=lambda *args, **kwargs: average_altitude_tool(),
         description="Compute average altitude of all balloons globally."
     ),
     Tool(
         name="fastest_balloon_last2h",
-        func=lambda *args, **kwargs: asyncio.run(fastest_balloon_last2h_tool(*args, **kwargs)),
+        func=None,
+        coroutine=lambda *args, **kwargs: fastest_balloon_last2h_tool(*args, **kwargs),
         description="Returns the balloon that moved the fastest between the last 2 hours."
     ),
     Tool(
         name="balloons_in_country",
-        func=lambda country: asyncio.run(balloons_in_country_tool(country)),
+        func=None,
+        coroutine=lambda country: balloons_in_country_tool(country),
         description="List all balloons currently in a given country. Input: country name as a string."
     ),
     Tool(
         name="visited_countries",
-        func=lambda balloon_id: asyncio.run(visited_countries_tool(balloon_id)),
+        func=None,
+        coroutine=lambda balloon_id: visited_countries_tool(balloon_id),
         description="Get the list of countries that a balloon has traveled through. Input: balloon ID string (e.g., 'B021')."
     ),
     Tool(
         name="get_hurricanes",
-        func=lambda *args, **kwargs: asyncio.run(fetch_hurricanes()),
+        func=None,
+        coroutine=lambda *args, **kwargs: fetch_hurricanes(),
         description="Fetch current active hurricanes and their positions."
     ),
     Tool(
         name="get_wildfires",
-        func=lambda bbox="-125,25,-66,49", hours=24: fetch_wildfires(bbox, hours),
+        func=None,
+        coroutine=lambda bbox="-125,25,-66,49", hours=24: asyncio.to_thread(fetch_wildfires, bbox, hours),
         description="Fetch recent wildfires from NASA FIRMS. Input optional: bounding box and time window in hours."
     ),
     Tool(
         name="get_all_balloon_speeds",
-        func=lambda *args, **kwargs: asyncio.run(get_all_balloon_speeds_tool()),
+        func=None,
+        coroutine=lambda *args, **kwargs: get_all_balloon_speeds_tool(),
         description="Get speeds for all balloons in the last hour. Returns list of balloons with speed data."
     ),
     Tool(
         name="fastest_balloons_by_country",
-        func=lambda *args, **kwargs: asyncio.run(fastest_balloons_by_country_tool()),
+        func=None,
+        coroutine=lambda *args, **kwargs: fastest_balloons_by_country_tool(),
         description="Get the fastest balloon in each country. Returns dictionary with country names as keys."
     ),
     Tool(
         name="top_fastest_balloons",
-        func=lambda *args, **kwargs: asyncio.run(top_fastest_balloons_tool(10)),
+        func=None,
+        coroutine=lambda *args, **kwargs: top_fastest_balloons_tool(10),
         description="Get the top 10 fastest balloons. Returns list of fastest balloons with speed data."
     ),
     Tool(
         name="balloon_speed_analysis",
-        func=lambda *args, **kwargs: asyncio.run(balloon_speed_analysis_tool()),
+        func=None,
+        coroutine=lambda *args, **kwargs: balloon_speed_analysis_tool(),
         description="Get comprehensive speed analysis including statistics, fastest/slowest balloons, and averages."
     ),
     Tool(
         name="most_distance_covered",
-        func=lambda *args, **kwargs: asyncio.run(most_distance_covered_tool()),
+        func=None,
+        coroutine=lambda *args, **kwargs: most_distance_covered_tool(),
         description="Get the balloon that has covered the most distance in the past hour."
     ),
     Tool(
         name="distance_rankings",
-        func=lambda *args, **kwargs: asyncio.run(distance_rankings_tool()),
+        func=None,
+        coroutine=lambda *args, **kwargs: distance_rankings_tool(),
         description="Get all balloons ranked by distance covered in the past hour."
     ),
     Tool(
         name="wind_analysis",
-        func=lambda *args, **kwargs: asyncio.run(wind_analysis_tool()),
+        func=None,
+        coroutine=lambda *args, **kwargs: wind_analysis_tool(),
         description="Analyze wind patterns, directions, and speeds across all balloons and countries."
     ),
     Tool(
         name="atmospheric_anomalies",
-        func=lambda *args, **kwargs: asyncio.run(atmospheric_anomalies_tool()),
+        func=None,
+        coroutine=lambda *args, **kwargs: atmospheric_anomalies_tool(),
         description="Detect atmospheric anomalies, unusual speeds, altitudes, or wind patterns."
     ),
     Tool(
         name="weather_fronts",
-        func=lambda *args, **kwargs: asyncio.run(weather_fronts_tool()),
+        func=None,
+        coroutine=lambda *args, **kwargs: weather_fronts_tool(),
         description="Detect potential weather fronts based on balloon movement patterns across regions."
     ),
     Tool(
         name="comprehensive_weather_analysis",
-        func=lambda *args, **kwargs: asyncio.run(comprehensive_weather_analysis_tool()),
+        func=None,
+        coroutine=lambda *args, **kwargs: comprehensive_weather_analysis_tool(),
         description="Get comprehensive weather analysis including wind patterns, anomalies, and fronts."
     ),
     Tool(
         name="balloons_by_country",
-        func=lambda *args, **kwargs: asyncio.run(balloons_by_country_tool()),
+        func=None,
+        coroutine=lambda *args, **kwargs: balloons_by_country_tool(),
         description="Get count of balloons by country. Answers questions like 'which country has the most balloons'."
     ),
     Tool(
         name="balloons_in_specific_country",
-        func=lambda country: asyncio.run(balloons_in_specific_country_tool(country)),
+        func=None,
+        coroutine=lambda country: balloons_in_specific_country_tool(country),
         description="Get balloons in a specific country. Input: country name (e.g., 'India', 'United States')."
     ),
 ]
@@ -156,16 +178,60 @@ agent = initialize_agent(
     verbose=True
 )
 
+# --- Answer cache ---
+# Answers are reused while the tools still share the balloon snapshots
+# they were computed from, and never for longer than the snapshot TTL
+ANSWER_CACHE_TTL = SNAPSHOT_TTL
+ANSWER_CACHE_SIZE = 256
+answer_cache = OrderedDict()  # (question, history messages) -> (answered_at, snapshots, answer)
+
+def normalize_question(question: str) -> str:
+    """Lowercase and collapse whitespace so near-identical questions share a key."""
+    # Signs, decimal points and operators change the meaning, so they stay
+    return " ".join(question.lower().split())
+
+def answer_key(question: str, chat_history=None) -> tuple:
+    """Cache key for a question asked after the given conversation."""
+    # Follow-ups ("which country is it in?") depend on the earlier messages
+    history = tuple((m.get("role"), m.get("content")) for m in chat_history or [])
+    return normalize_question(question), history
+
+def snapshot_times() -> tuple:
+    """Fetch times of the current and previous hour snapshots the tools read."""
+    return balloon_store.fetched_at(0), balloon_store.fetched_at(1)
+
+def cached_answer(key: tuple):
+    entry = answer_cache.get(key)
+    if entry is None:
+        return None
+    answered_at, snapshots, answer = entry
+    # Drop answers computed from a snapshot that has since been replaced
+    if time.monotonic() - answered_at >= ANSWER_CACHE_TTL or snapshots != snapshot_times():
+        del answer_cache[key]
+        return None
+    answer_cache.move_to_end(key)
+    return answer
+
+def store_answer(key: tuple, answer: str):
+    answer_cache[key] = (time.monotonic(), snapshot_times(), answer)
+    answer_cache.move_to_end(key)
+    while len(answer_cache) > ANSWER_CACHE_SIZE:
+        answer_cache.popitem(last=False)
+
 # --- Async wrapper ---
 async def ask(question: str, chat_history=None):
+    key = answer_key(question, chat_history)
+    answer = cached_answer(key)
+    if answer is not None:
+        return answer
+    
     try:
-        loop = asyncio.get_event_loop()
         chat_history = chat_history or []
         
-        response = await loop.run_in_executor(
-            None,
-            lambda: agent.run({"input": question, "chat_history": list(chat_history)})
-        )
-        return response
+        # Run the agent on this event loop so tool coroutines are awaited
+        # directly, and multiple actions in one step run concurrently
+        response = await agent.ainvoke({"input": question, "chat_history": list(chat_history)})
+        store_answer(key, response["output"])
+        return response["output"]
     except Exception as e:
         return f"I'm sorry, I encountered an error: {str(e)}. Please try again or check if the balloon data is available."
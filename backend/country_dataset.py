@@ -1,16 +1,95 @@
 """
 Lightweight country detection using local dataset.
 Much faster than API calls and doesn't break the pipeline.
+
+Regenerate the precomputed raster after editing the country bounds with:
+    python country_dataset.py --build-raster
 """
 import json
 import math
-from typing import Dict, List, Tuple
+import os
+import sys
+import tempfile
+import threading
+from typing import Dict, List, Sequence, Tuple
+import numpy as np
+
+# Size of the grid cells used to index country bounds (in degrees)
+GRID_CELL_DEG = 10.0
+GRID_ROWS = int(180 / GRID_CELL_DEG)
+GRID_COLS = int(360 / GRID_CELL_DEG)
+
+# Number of points tested against the bounds array at a time
+BATCH_BLOCK_SIZE = 4096
+
+# Precomputed raster of 0.1 degree cells (~11km) mapping cell -> country index
+RASTER_CELLS_PER_DEG = 10
+RASTER_ROWS = 180 * RASTER_CELLS_PER_DEG
+RASTER_COLS = 360 * RASTER_CELLS_PER_DEG
+# Marks cells crossed by a country boundary, which need an exact lookup
+RASTER_BOUNDARY = np.iinfo(np.uint16).max
+
+def write_replace(path: str, mode: str, write):
+    """Write a file through a temp file unique to this writer, then swap it in."""
+    # Workers starting together would clobber a shared temp name
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(path) or ".", prefix=f"{os.path.basename(path)}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, mode) as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
 
 class CountryDataset:
     """Fast country detection using local dataset."""
     
-    def __init__(self):
+    def __init__(self, raster_file: str = "data/country_raster.npy"):
         self.country_bounds = self._load_country_bounds()
+        self.grid_index = self._build_grid_index()
+        self.country_names, self.bounds_array = self._build_bounds_array()
+        self.raster_file = raster_file
+        self.raster = self._load_raster()
+    
+    def _raster_names_file(self) -> str:
+        """Path of the country names and bounds saved alongside the raster."""
+        return os.path.splitext(self.raster_file)[0] + "_names.json"
+    
+    def _raster_key(self) -> Dict:
+        """Inputs the raster was built from, to detect an out of date file."""
+        return {"names": self.country_names.tolist(), "bounds": self.bounds_array.tolist()}
+    
+    def _load_raster(self) -> np.ndarray:
+        """Load the precomputed raster from file, or build and save it."""
+        try:
+            if os.path.exists(self.raster_file) and os.path.exists(self._raster_names_file()):
+                with open(self._raster_names_file(), 'r') as f:
+                    key = json.load(f)
+                # A raster built from different bounds would map to the wrong countries
+                if key == self._raster_key():
+                    return np.load(self.raster_file, mmap_mode='r')
+                print("Warning: Country raster is out of date, rebuilding")
+        except Exception as e:
+            print(f"Warning: Could not load country raster: {e}")
+        raster = self._build_raster()
+        
+        # Save it so later processes can map the file instead of rebuilding
+        try:
+            self.raster = raster
+            self.save_raster()
+        except Exception as e:
+            print(f"Warning: Could not save country raster: {e}")
+        return raster
+    
+    def save_raster(self):
+        """Save the raster and its country names and bounds to file."""
+        os.makedirs(os.path.dirname(self.raster_file), exist_ok=True)
+        # Swap in complete files so other processes never map a partial
+        # raster; the key goes last so it never vouches for an old one
+        write_replace(self.raster_file, 'wb', lambda f: np.save(f, np.asarray(self.raster)))
+        write_replace(self._raster_names_file(), 'w', lambda f: json.dump(self._raster_key(), f))
     
     def _load_country_bounds(self) -> Dict:
         """Load country boundaries from local dataset."""
@@ -317,29 +396,170 @@ class CountryDataset:
             "Cape Verde": {"lat_min": 14.0, "lat_max": 17.0, "lon_min": -25.0, "lon_max": -22.0},
         }
     
+    def _grid_cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        """Get the (row, col) grid cell containing the given coordinates."""
+        row = int((lat + 90) // GRID_CELL_DEG)
+        col = int((lon + 180) // GRID_CELL_DEG)
+        return min(max(row, 0), GRID_ROWS - 1), min(max(col, 0), GRID_COLS - 1)
+    
+    def _build_grid_index(self) -> Dict[Tuple[int, int], List[Tuple[str, Dict]]]:
+        """Index country bounds by the grid cells they overlap."""
+        grid_index = {}
+        for country, bounds in self.country_bounds.items():
+            # Bounds crossing the antimeridian (lon_min > lon_max) never match
+            if bounds["lat_min"] > bounds["lat_max"] or bounds["lon_min"] > bounds["lon_max"]:
+                continue
+            row_min, col_min = self._grid_cell(bounds["lat_min"], bounds["lon_min"])
+            row_max, col_max = self._grid_cell(bounds["lat_max"], bounds["lon_max"])
+            for row in range(row_min, row_max + 1):
+                for col in range(col_min, col_max + 1):
+                    # Cells keep dataset order so the first matching country still wins
+                    grid_index.setdefault((row, col), []).append((country, bounds))
+        return grid_index
+    
+    def _build_bounds_array(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Pack country bounds into a (C, 4) array for batch lookups."""
+        names = []
+        rows = []
+        for country, bounds in self.country_bounds.items():
+            if bounds["lat_min"] > bounds["lat_max"] or bounds["lon_min"] > bounds["lon_max"]:
+                continue
+            names.append(country)
+            rows.append([bounds["lat_min"], bounds["lat_max"], bounds["lon_min"], bounds["lon_max"]])
+        # Trailing "Unknown" is returned for points outside every country
+        names.append("Unknown")
+        return np.array(names, dtype=object), np.array(rows, dtype=np.float64)
+    
+    def _build_raster(self) -> np.ndarray:
+        """Rasterize country bounds into a (rows, cols) uint16 array."""
+        eps = 1e-9
+        pending = RASTER_BOUNDARY - 1
+        raster = np.full((RASTER_ROWS, RASTER_COLS), pending, dtype=np.uint16)
+        lat_lo = np.arange(RASTER_ROWS) / RASTER_CELLS_PER_DEG - 90 - eps
+        lat_hi = lat_lo + 1 / RASTER_CELLS_PER_DEG + 2 * eps
+        lon_lo = np.arange(RASTER_COLS) / RASTER_CELLS_PER_DEG - 180 - eps
+        lon_hi = lon_lo + 1 / RASTER_CELLS_PER_DEG + 2 * eps
+        
+        # Countries are painted in dataset order and each cell keeps the first
+        # country that touches it, matching the first-match rule of get_country
+        for idx, (b_lat_min, b_lat_max, b_lon_min, b_lon_max) in enumerate(self.bounds_array):
+            rows = np.nonzero((lat_hi > b_lat_min) & (lat_lo <= b_lat_max))[0]
+            cols = np.nonzero((lon_hi > b_lon_min) & (lon_lo <= b_lon_max))[0]
+            if len(rows) == 0 or len(cols) == 0:
+                continue
+            r0, r1, c0, c1 = rows[0], rows[-1] + 1, cols[0], cols[-1] + 1
+            block = raster[r0:r1, c0:c1]
+            inside = (((b_lat_min <= lat_lo[r0:r1]) & (lat_hi[r0:r1] <= b_lat_max))[:, None] &
+                      ((b_lon_min <= lon_lo[c0:c1]) & (lon_hi[c0:c1] <= b_lon_max))[None, :])
+            open_cells = block == pending
+            block[open_cells & inside] = idx
+            # Cells only partly covered by this country are ambiguous
+            block[open_cells & ~inside] = RASTER_BOUNDARY
+        
+        raster[raster == pending] = len(self.bounds_array)
+        return raster
+    
+    def _find_country(self, lat: float, lon: float) -> str:
+        """Check the countries whose bounds overlap the point's grid cell."""
+        for country, bounds in self.grid_index.get(self._grid_cell(lat, lon), []):
+            if (bounds["lat_min"] <= lat <= bounds["lat_max"] and 
+                bounds["lon_min"] <= lon <= bounds["lon_max"]):
+                return country
+        return "Unknown"
+    
     def get_country(self, lat: float, lon: float) -> str:
         """Get country for given coordinates using local dataset."""
         try:
-            for country, bounds in self.country_bounds.items():
-                if (bounds["lat_min"] <= lat <= bounds["lat_max"] and 
-                    bounds["lon_min"] <= lon <= bounds["lon_max"]):
-                    return country
-            return "Unknown"
+            if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+                return "Unknown"
+            row = min(math.floor((lat + 90) * RASTER_CELLS_PER_DEG), RASTER_ROWS - 1)
+            col = min(math.floor((lon + 180) * RASTER_CELLS_PER_DEG), RASTER_COLS - 1)
+            country_id = self.raster[row, col]
+            if country_id != RASTER_BOUNDARY:
+                return self.country_names[country_id]
+            return self._find_country(lat, lon)
         except Exception as e:
             print(f"Error in country detection: {e}")
             return "Unknown"
+    
+    def _get_country_ids_exact(self, lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+        """Test a batch of points against every country's bounds."""
+        lat = lat.reshape(-1, 1)
+        lon = lon.reshape(-1, 1)
+        bounds = self.bounds_array
+        # Points outside every country keep the trailing "Unknown" index
+        ids = np.full(len(lat), len(bounds), dtype=np.int32)
+        
+        # Reuse the same (block, C) buffers for every block instead of
+        # allocating a temporary per comparison
+        inside = np.empty((min(len(lat), BATCH_BLOCK_SIZE), len(bounds)), dtype=bool)
+        test = np.empty_like(inside)
+        for start in range(0, len(lat), BATCH_BLOCK_SIZE):
+            block_lat = lat[start:start + BATCH_BLOCK_SIZE]
+            block_lon = lon[start:start + BATCH_BLOCK_SIZE]
+            n = len(block_lat)
+            block_inside, block_test = inside[:n], test[:n]
+            np.less_equal(bounds[:, 0], block_lat, out=block_inside)
+            np.less_equal(block_lat, bounds[:, 1], out=block_test)
+            block_inside &= block_test
+            np.less_equal(bounds[:, 2], block_lon, out=block_test)
+            block_inside &= block_test
+            np.less_equal(block_lon, bounds[:, 3], out=block_test)
+            block_inside &= block_test
+            
+            # First matching country per point wins, same as get_country
+            hit = block_inside.any(axis=1)
+            ids[start:start + n][hit] = block_inside.argmax(axis=1)[hit]
+        return ids
+    
+    def get_country_ids(self, lats: Sequence[float], lons: Sequence[float]) -> np.ndarray:
+        """Get indices into country_names for a batch of coordinates."""
+        lat = np.asarray(lats, dtype=np.float64).ravel()
+        lon = np.asarray(lons, dtype=np.float64).ravel()
+        ids = np.full(len(lat), len(self.bounds_array), dtype=np.int32)
+        
+        valid = (lat >= -90) & (lat <= 90) & (lon >= -180) & (lon <= 180)
+        rows = np.minimum(np.floor((lat[valid] + 90) * RASTER_CELLS_PER_DEG), RASTER_ROWS - 1).astype(np.intp)
+        cols = np.minimum(np.floor((lon[valid] + 180) * RASTER_CELLS_PER_DEG), RASTER_COLS - 1).astype(np.intp)
+        ids[valid] = self.raster[rows, cols]
+        
+        # Only points in boundary cells need the full bounds test
+        boundary = ids == RASTER_BOUNDARY
+        if boundary.any():
+            ids[boundary] = self._get_country_ids_exact(lat[boundary], lon[boundary])
+        return ids
+    
+    def get_countries(self, lats: Sequence[float], lons: Sequence[float]) -> List[str]:
+        """Get countries for a batch of coordinates using local dataset."""
+        return self.country_names[self.get_country_ids(lats, lons)].tolist()
 
 # Global instance
 _country_dataset = None
+_country_dataset_lock = threading.Lock()
 
 def get_country_dataset() -> CountryDataset:
     """Get or create the global country dataset instance."""
     global _country_dataset
     if _country_dataset is None:
-        _country_dataset = CountryDataset()
+        # Lookups run in worker threads, so only build the dataset once
+        with _country_dataset_lock:
+            if _country_dataset is None:
+                _country_dataset = CountryDataset()
     return _country_dataset
 
 def get_country_for_coordinates(lat: float, lon: float) -> str:
     """Get country for given coordinates using local dataset."""
     dataset = get_country_dataset()
     return dataset.get_country(lat, lon)
+
+def get_countries_for_coordinates(lats: Sequence[float], lons: Sequence[float]) -> List[str]:
+    """Get countries for a batch of coordinates using local dataset."""
+    dataset = get_country_dataset()
+    return dataset.get_countries(lats, lons)
+
+if __name__ == "__main__":
+    if "--build-raster" in sys.argv:
+        dataset = CountryDataset()
+        dataset.raster = dataset._build_raster()
+        dataset.save_raster()
+        print(f"Saved country raster to {dataset.raster_file}")
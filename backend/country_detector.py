@@ -8,6 +8,11 @@ import asyncio
 from typing import Dict, Optional
 import httpx
 import os
+from country_dataset import write_replace
+from http_pool import PooledClient
+
+# Delay between a cache insertion and writing the cache file (in seconds)
+CACHE_FLUSH_DELAY = 5.0
 
 class CountryDetector:
     """Lightweight country detector with caching."""
@@ -16,6 +21,14 @@ class CountryDetector:
         self.cache_file = cache_file
         self.cache = self._load_cache()
         self.api_delay = 0.1  # 100ms delay between API calls to be respectful
+        self._dirty = False
+        self._flush_task = None
+        self._http = PooledClient(
+            timeout=10,
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=50),
+            headers={"User-Agent": "Windborne-Balloon-Tracker/1.0"}
+        )
+        self._inflight = {}  # cache_key -> in-flight lookup task
     
     def _load_cache(self) -> Dict:
         """Load country cache from file."""
@@ -31,15 +44,40 @@ class CountryDetector:
         """Save country cache to file."""
         try:
             os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
-            with open(self.cache_file, 'w') as f:
-                json.dump(self.cache, f)
+            # Write to a temp file and swap it in so readers never see a partial file
+            write_replace(self.cache_file, 'w', lambda f: json.dump(self.cache, f))
         except Exception as e:
             print(f"Warning: Could not save country cache: {e}")
     
+    def flush(self):
+        """Write the cache to file if it has unsaved entries."""
+        if self._dirty:
+            self._dirty = False
+            self._save_cache()
+    
+    async def _flush_later(self):
+        """Write the cache once after CACHE_FLUSH_DELAY."""
+        try:
+            await asyncio.sleep(CACHE_FLUSH_DELAY)
+        finally:
+            # Also flush when the loop shuts down and cancels this task
+            self.flush()
+    
+    def _schedule_flush(self):
+        """Mark the cache dirty and batch the write with other insertions."""
+        self._dirty = True
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush_later())
+    
     def _get_cache_key(self, lat: float, lon: float) -> str:
         """Generate cache key for coordinates (rounded to 2 decimal places)."""
         return f"{round(lat, 2)},{round(lon, 2)}"
     
+    async def aclose(self):
+        """Close the pooled HTTP client and write any unsaved cache entries."""
+        await self._http.aclose()
+        self.flush()
+    
     async def get_country(self, lat: float, lon: float) -> str:
         """Get country for given coordinates."""
         cache_key = self._get_cache_key(lat, lon)
@@ -48,14 +86,28 @@ class CountryDetector:
         if cache_key in self.cache:
             return self.cache[cache_key]
         
-        # Try multiple free APIs
-        country = await self._fetch_country_from_api(lat, lon)
-        
-        # Cache the result
-        self.cache[cache_key] = country
-        self._save_cache()
-        
-        return country
+        # Join an in-flight lookup for the same cell instead of calling the APIs again
+        loop = asyncio.get_running_loop()
+        task = self._inflight.get(cache_key)
+        if task is None or task.get_loop() is not loop:
+            task = loop.create_task(self._lookup(cache_key, lat, lon))
+            self._inflight[cache_key] = task
+        return await asyncio.shield(task)
+    
+    async def _lookup(self, cache_key: str, lat: float, lon: float) -> str:
+        """Fetch and cache the country for one cache cell."""
+        try:
+            # Try multiple free APIs
+            country = await self._fetch_country_from_api(lat, lon)
+            
+            # Cache the result
+            self.cache[cache_key] = country
+            self._schedule_flush()
+            
+            return country
+        finally:
+            if self._inflight.get(cache_key) is asyncio.current_task():
+                del self._inflight[cache_key]
     
     async def _fetch_country_from_api(self, lat: float, lon: float) -> str:
         """Fetch country from free reverse geocoding API with timeout."""
@@ -83,46 +135,42 @@ class CountryDetector:
     
     async def _try_nominatim_api(self, lat: float, lon: float) -> str:
         """Try OpenStreetMap Nominatim API (free, no key required)."""
-        async with httpx.AsyncClient(timeout=10) as client:
-            url = f"https://nominatim.openstreetmap.org/reverse"
-            params = {
-                "lat": lat,
-                "lon": lon,
-                "format": "json",
-                "addressdetails": 1
-            }
-            headers = {"User-Agent": "Windborne-Balloon-Tracker/1.0"}
-            
-            response = await client.get(url, params=params, headers=headers)
-            if response.status_code == 200:
-                data = response.json()
-                return data.get("address", {}).get("country", "Unknown")
+        url = f"https://nominatim.openstreetmap.org/reverse"
+        params = {
+            "lat": lat,
+            "lon": lon,
+            "format": "json",
+            "addressdetails": 1
+        }
+        
+        response = await self._http.client().get(url, params=params)
+        if response.status_code == 200:
+            data = response.json()
+            return data.get("address", {}).get("country", "Unknown")
         
         return "Unknown"
     
     async def _try_bigdatacloud_api(self, lat: float, lon: float) -> str:
         """Try BigDataCloud API (free tier available)."""
-        async with httpx.AsyncClient(timeout=10) as client:
-            url = f"https://api.bigdatacloud.net/data/reverse-geocode-client"
-            params = {"latitude": lat, "longitude": lon, "localityLanguage": "en"}
-            
-            response = await client.get(url, params=params)
-            if response.status_code == 200:
-                data = response.json()
-                return data.get("countryName", "Unknown")
+        url = f"https://api.bigdatacloud.net/data/reverse-geocode-client"
+        params = {"latitude": lat, "longitude": lon, "localityLanguage": "en"}
+        
+        response = await self._http.client().get(url, params=params)
+        if response.status_code == 200:
+            data = response.json()
+            return data.get("countryName", "Unknown")
         
         return "Unknown"
     
     async def _try_geocode_xyz_api(self, lat: float, lon: float) -> str:
         """Try GeoCode.xyz API (free tier available)."""
-        async with httpx.AsyncClient(timeout=10) as client:
-            url = f"https://geocode.xyz/{lat},{lon}"
-            params = {"json": 1}
-            
-            response = await client.get(url, params=params)
-            if response.status_code == 200:
-                data = response.json()
-                return data.get("country", "Unknown")
+        url = f"https://geocode.xyz/{lat},{lon}"
+        params = {"json": 1}
+        
+        response = await self._http.client().get(url, params=params)
+        if response.status_code == 200:
+            data = response.json()
+            return data.get("country", "Unknown")
         
         return "Unknown"
 
@@ -1,4 +1,7 @@
 # helpers.py
+import numpy as np
+
+EARTH_RADIUS_KM = 6371
 
 STATE_BBOXES = {
     "texas": {"lat_min": 25.8, "lat_max": 36.5, "lon_min": -106.6, "lon_max": -93.5},
@@ -6,40 +9,121 @@ STATE_BBOXES = {
     # Add more states...
 }
 
+def as_array(balloons):
+    """View balloons as an (N, 3) array of [lat, lon, alt] rows.
+    Accepts raw [[lat, lon, alt], ...] rows or a tools.BalloonFrame."""
+    coords = getattr(balloons, "coords", balloons)
+    try:
+        arr = np.asarray(coords, dtype=np.float64)
+    except ValueError:
+        # Rows of different lengths; keep the [lat, lon, alt] of each
+        try:
+            arr = np.array([row[:3] for row in coords], dtype=np.float64)
+        except ValueError:
+            raise ValueError("Expected rows of [lat, lon, alt], got rows with fewer than 3 values") from None
+    if arr.size == 0:
+        return arr.reshape(0, 3)
+    if arr.ndim != 2 or arr.shape[1] < 3:
+        raise ValueError(f"Expected rows of [lat, lon, alt], got an array of shape {arr.shape}")
+    # Extra columns are ignored, as when rows were read as b[0..2]
+    return arr[:, :3]
+
+# STATE_BBOXES packed as (S, 4) rows of [lat_min, lat_max, lon_min, lon_max]
+STATE_NAMES = np.array(list(STATE_BBOXES), dtype=object)
+STATE_BOX = np.array(
+    [[b["lat_min"], b["lat_max"], b["lon_min"], b["lon_max"]] for b in STATE_BBOXES.values()],
+    dtype=np.float64
+).reshape(-1, 4)
+STATE_INDEX = {name: i for i, name in enumerate(STATE_BBOXES)}
+
 def balloons_in_region(balloons, state_name):
-    bbox = STATE_BBOXES.get(state_name.lower())
-    if not bbox:
-        return balloons  # return all if unknown
+    """[lat, lon, alt] rows inside the state's box, as a list like the input."""
+    i = STATE_INDEX.get(state_name.lower())
+    if i is None:
+        return as_array(balloons).tolist()  # return all if unknown
+    lat_min, lat_max, lon_min, lon_max = STATE_BOX[i]
+
+    # (N, 3) array of [lat, lon, alt] rows, masked in one pass per bound
+    arr = as_array(balloons)
+    mask = (
+        (arr[:, 0] >= lat_min) & (arr[:, 0] <= lat_max)  # latitude
+        & (arr[:, 1] >= lon_min) & (arr[:, 1] <= lon_max)  # longitude
+    )
+    return arr[mask].tolist()
+
+def balloon_states(balloons):
+    """Name of the first state whose box contains each balloon, or None."""
+    arr = as_array(balloons)
+    lat = arr[:, 0, None]
+    lon = arr[:, 1, None]
+    # (N, S) membership of every balloon in every state box
+    inside = (
+        (lat >= STATE_BOX[:, 0]) & (lat <= STATE_BOX[:, 1])
+        & (lon >= STATE_BOX[:, 2]) & (lon <= STATE_BOX[:, 3])
+    )
+    hit = inside.any(axis=1)
+    names = np.full(len(arr), None, dtype=object)
+    names[hit] = STATE_NAMES[inside.argmax(axis=1)[hit]]
+    return names.tolist()
 
-    filtered = [
-        b for b in balloons
-        if bbox["lat_min"] <= b[0] <= bbox["lat_max"]  # latitude
-        and bbox["lon_min"] <= b[1] <= bbox["lon_max"]  # longitude
-    ]
-    return filtered
+def altitude_stats(balloons):
+    """Average altitude and index of the highest balloon from one array."""
+    arr = as_array(balloons)
+    alts = arr[:, 2]
+    # A missing (NaN) altitude can't be the highest, as with max()
+    return float(alts.mean()), int(np.where(np.isnan(alts), -np.inf, alts).argmax()), arr
 
 def average_altitude(balloons):
-    if not balloons:
+    if not len(balloons):
         return 0
-    return sum(b[2] for b in balloons) / len(balloons)
+    return altitude_stats(balloons)[0]
 
 def highest_balloon(balloons):
-    if not balloons:
+    if not len(balloons):
         return None
-    highest = max(balloons, key=lambda x: x[2])
-    return {"id": balloons.index(highest), "lat": highest[0], "lon": highest[1], "altitude": highest[2]}
+    _, i, arr = altitude_stats(balloons)
+    return {"id": i, "lat": float(arr[i, 0]), "lon": float(arr[i, 1]), "altitude": float(arr[i, 2])}
 
 def fastest_balloon(current, previous):
-    if not current or not previous:
+    if not len(current) or not len(previous):
+        return None, 0
+    # Pair each balloon with its previous position; extra balloons have none
+    n = min(len(current), len(previous))
+    curr = as_array(current)[:n]
+    prev = as_array(previous)[:n]
+    # Great-circle distance in km / delta t (assuming 1 hour). The haversine
+    # term grows with distance, so rank by it and only finish the winner
+    lat_c, lat_p = np.radians(curr[:, 0]), np.radians(prev[:, 0])
+    sin_dlat = np.sin((lat_c - lat_p) / 2)
+    sin_dlon = np.sin(np.radians(curr[:, 1] - prev[:, 1]) / 2)
+    hav = sin_dlat * sin_dlat + np.cos(lat_c) * np.cos(lat_p) * sin_dlon * sin_dlon
+    # Balloons with a missing (NaN) position can't be the fastest
+    hav[np.isnan(hav)] = -np.inf
+    i = int(hav.argmax())
+    if hav[i] == -np.inf:
+        return None, 0
+    dist = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(min(hav[i], 1.0)))
+    return i, float(dist)  # returns index and speed
+
+def haversine_to_point(balloons, lat0, lon0):
+    """Great-circle distance in km from every balloon to one fixed point."""
+    arr = as_array(balloons)
+    # The fixed point's trig is computed once, not per balloon
+    lat0_rad = np.radians(lat0)
+    cos_lat0 = np.cos(lat0_rad)
+    lat = np.radians(arr[:, 0])
+    sin_dlat = np.sin((lat - lat0_rad) / 2)
+    sin_dlon = np.sin(np.radians(arr[:, 1] - lon0) / 2)
+    hav = sin_dlat * sin_dlat + cos_lat0 * np.cos(lat) * sin_dlon * sin_dlon
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(hav, 1.0)))
+
+def nearest_balloon(balloons, lat0, lon0):
+    if not len(balloons):
         return None, 0
-    speeds = []
-    for i, b in enumerate(current):
-        if i < len(previous):
-            prev = previous[i]
-            # Rough 2D distance / delta t (assuming 1 hour)
-            dist = ((b[0]-prev[0])**2 + (b[1]-prev[1])**2)**0.5
-            speeds.append((i, dist))
-    if not speeds:
+    dist = haversine_to_point(balloons, lat0, lon0)
+    # Balloons with a missing (NaN) position can't be the nearest
+    dist[np.isnan(dist)] = np.inf
+    i = int(dist.argmin())
+    if dist[i] == np.inf:
         return None, 0
-    fastest = max(speeds, key=lambda x: x[1])
-    return fastest  # returns index and speed
+    return i, float(dist[i])  # returns index and distance in km
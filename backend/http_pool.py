@@ -0,0 +1,40 @@
+"""
+Pooled HTTP clients shared between calls on the same event loop.
+"""
+import asyncio
+import httpx
+
+class PooledClient:
+    """Keeps one httpx.AsyncClient for the running event loop."""
+
+    def __init__(self, **client_kwargs):
+        self.client_kwargs = client_kwargs
+        self._client = None
+        self._loop = None
+
+    def client(self) -> httpx.AsyncClient:
+        """Get the pooled HTTP client for the running event loop."""
+        loop = asyncio.get_running_loop()
+        # Pooled connections belong to the loop that opened them, so a new
+        # loop (e.g. a one-off asyncio.run) gets its own client
+        if self._client is None or self._loop is not loop:
+            self._close_stale()
+            self._client = httpx.AsyncClient(**self.client_kwargs)
+            self._loop = loop
+        return self._client
+
+    def _close_stale(self):
+        """Close the previous loop's client on that loop to release its sockets."""
+        client, loop = self._client, self._loop
+        self._client = None
+        self._loop = None
+        # A closed loop can't run aclose(); its sockets go with the client
+        if client is not None and not loop.is_closed():
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+
+    async def aclose(self):
+        """Close the pooled client; call it on the loop that uses it."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._loop = None
@@ -1,14 +1,51 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 from agent import ask  # <-- this ask uses the agent from agent.py
-from collections import deque
-from tools import fetch_balloons, format_balloons, enrich_with_country
+from collections import OrderedDict, deque
+from tools import balloon_store
+from country_dataset import get_country_dataset
 import asyncio
+import json
 import os
+import threading
+import numpy as np
 
-chat_history = deque(maxlen=20)
+# Recent messages per chat session, dropping the least recently used sessions
+CHAT_HISTORY_LEN = 20
+MAX_CHAT_SESSIONS = 1000
+chat_histories = OrderedDict()  # session_id -> deque of messages
+chat_histories_lock = threading.Lock()
+# Last /balloons response body and the snapshot list it was built from
+balloons_payload = (None, None)
 app = Flask(__name__)
 
+# One long-lived event loop for all requests, so pooled clients and shared
+# fetches survive between requests instead of dying with a per-request loop
+try:
+    import uvloop  # libuv-based loop; not available on Windows
+    loop = uvloop.new_event_loop()
+except ImportError:
+    loop = asyncio.new_event_loop()
+threading.Thread(target=loop.run_forever, daemon=True).start()
+
+# Load the country raster at startup instead of on the first /balloons request
+get_country_dataset()
+
+def get_chat_history(session_id: str) -> deque:
+    """Get the message history for a chat session, creating it if needed."""
+    with chat_histories_lock:
+        history = chat_histories.get(session_id)
+        if history is None:
+            history = chat_histories[session_id] = deque(maxlen=CHAT_HISTORY_LEN)
+            while len(chat_histories) > MAX_CHAT_SESSIONS:
+                chat_histories.popitem(last=False)
+        chat_histories.move_to_end(session_id)
+        return history
+
+def run_async(coro):
+    """Run a coroutine on the app's event loop and wait for its result."""
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
 # Add CORS support
 CORS(app, origins="*")
 
@@ -24,9 +61,10 @@ def ask_endpoint():
     try:
         data = request.get_json()
         question = data.get("question", "")
+        chat_history = get_chat_history(str(data.get("session_id", "default")))
         
-        # Run async function in sync context
-        response = asyncio.run(ask(question, list(chat_history)))
+        # Run async function on the app's event loop
+        response = run_async(ask(question, list(chat_history)))
         
         chat_history.append({"role": "user", "content": question})
         chat_history.append({"role": "assistant", "content": response})
@@ -38,41 +76,50 @@ def ask_endpoint():
 @app.route("/balloons", methods=["GET"])
 def get_balloons():
     """Get current balloon data with country information"""
+    global balloons_payload
     try:
-        # Run async function in sync context with timeout
-        raw_balloons = asyncio.run(asyncio.wait_for(fetch_balloons(0), timeout=10.0))
-        
-        # Format balloon data
-        formatted_balloons = format_balloons(raw_balloons)
-        
-        # Enrich with country information using local dataset
-        enriched_balloons = enrich_with_country(formatted_balloons)
+        # Run async function on the app's event loop with timeout
+        # Balloons come back formatted and enriched with country information
+        enriched_balloons = run_async(asyncio.wait_for(balloon_store.get(0), timeout=10.0))
         
-        # Add balloon IDs and mock data for frontend
-        balloons_with_ids = []
-        for i, balloon in enumerate(enriched_balloons):
-            balloon_data = {
-                "id": f"B{str(i + 1).zfill(3)}",
-                "lat": balloon["lat"],
-                "lng": balloon["lon"],  # Frontend expects 'lng'
-                "altitude": balloon["alt"],
-                "speed": round(15 + (i % 20), 1),  # Mock speed between 15-35 km/h
-                "country": balloon.get("country", "Unknown"),  # Real country detection
-                "city": "Unknown",  # Simplified - no city detection
-                "lastUpdate": "2024-01-01T00:00:00Z"  # Mock timestamp
-            }
-            balloons_with_ids.append(balloon_data)
-        
-        return {
-            "balloons": balloons_with_ids,
-            "total": len(balloons_with_ids),
-            "timestamp": "2024-01-01T00:00:00Z"
-        }
+        # The store hands back the same list until the snapshot is refreshed
+        snapshot, body = balloons_payload
+        if snapshot is not enriched_balloons:
+            body = build_balloons_body(enriched_balloons)
+            balloons_payload = (enriched_balloons, body)
+        return app.response_class(body, mimetype="application/json")
     except asyncio.TimeoutError:
         return {"error": "Request timed out - country detection is taking too long"}, 500
     except Exception as e:
         return {"error": f"Failed to fetch balloon data: {str(e)}"}, 500
 
+def build_balloons_body(enriched_balloons) -> bytes:
+    """Encode the /balloons response once per snapshot."""
+    # Add balloon IDs and mock data for frontend, built a column at a time
+    index = np.arange(len(enriched_balloons))
+    ids = np.char.mod("B%03d", index + 1).tolist()
+    speeds = (15 + index % 20).tolist()  # Mock speed between 15-35 km/h
+    balloons_with_ids = [
+        {
+            "id": balloon_id,
+            "lat": balloon["lat"],
+            "lng": balloon["lon"],  # Frontend expects 'lng'
+            "altitude": balloon["alt"],
+            "speed": speed,
+            "country": balloon.get("country", "Unknown"),  # Real country detection
+            "city": "Unknown",  # Simplified - no city detection
+            "lastUpdate": "2024-01-01T00:00:00Z"  # Mock timestamp
+        }
+        for balloon_id, speed, balloon in zip(ids, speeds, enriched_balloons)
+    ]
+    
+    payload = {
+        "balloons": balloons_with_ids,
+        "total": len(balloons_with_ids),
+        "timestamp": "2024-01-01T00:00:00Z"
+    }
+    return json.dumps(payload, separators=(",", ":")).encode()
+
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 8000))
     print(f"Starting Flask app on port {port}")
@@ -1,85 +1,264 @@
 import datetime
-from typing import List, Dict
+from dataclasses import dataclass
+from functools import cached_property
+from typing import List, Dict, Optional
 import math
 from pathlib import Path
 import requests
 import httpx
 import os
-import json
+import tempfile
 import time
 import asyncio
+import itertools
+import numpy as np
 
 # --- Load country detector ---
-from country_dataset import get_country_for_coordinates
-CACHE_FILE = Path("data/balloons_cache.json")
+from country_dataset import get_countries_for_coordinates
+from http_pool import PooledClient
+CACHE_DIR = Path("data/balloons")
 CACHE_TTL = 30 * 60  # 30 minutes in seconds
 
-async def fetch_balloons(hours_ago: int = 0):
+_http = PooledClient(timeout=10)
+
+def _rows_to_array(rows: list) -> np.ndarray:
+    """Pack parsed [[lat, lon, alt, ...], ...] rows into an (N, 3) float64 array."""
+    if not isinstance(rows, list):
+        raise ValueError(f"Malformed balloon payload: expected a list of rows, got {type(rows).__name__}")
+    # Flattening through fromiter skips the nested-list shape discovery of
+    # np.asarray; extra columns are ignored and null becomes NaN
+    try:
+        exact = set(map(len, rows)) == {3}
+    except TypeError:
+        exact = False
+    # Slicing every row costs about as much as np.asarray, so only do it
+    # when some row isn't exactly a triple
+    columns = rows if exact else (row[:3] for row in rows)
+    try:
+        flat = np.fromiter(itertools.chain.from_iterable(columns), dtype=np.float64)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Malformed balloon payload: {e}") from e
+    # Each row contributes at most 3 values, so any short row shows up here
+    if len(flat) != 3 * len(rows):
+        raise ValueError("Malformed balloon payload: every row needs [lat, lon, alt]")
+    return flat.reshape(-1, 3)
+
+def _cache_path(hours_ago: int) -> Path:
+    """Path of the cached snapshot for one hour."""
+    return CACHE_DIR / f"{hours_ago:02d}.npy"
+
+async def fetch_balloons(hours_ago: int = 0) -> np.ndarray:
     """
-    Fetch balloons from API or cache (JSON).
-    If cache is older than 30 minutes, refresh.
+    Fetch balloons from API or cache as an (N, 3) array of [lat, lon, alt].
+    Each hour is cached in its own .npy file; if it is older than 30
+    minutes, refresh.
     """
-    now = time.time()
+    cache_path = _cache_path(hours_ago)
 
     # Check if cache exists and is fresh
-    if CACHE_FILE.exists():
-        with open(CACHE_FILE, "r") as f:
-            cached = json.load(f)
-        cached_time = cached.get("timestamp", 0)
-        if now - cached_time < CACHE_TTL and str(hours_ago) in cached["data"]:
-            return cached["data"][str(hours_ago)]
+    try:
+        if time.time() - cache_path.stat().st_mtime < CACHE_TTL:
+            return np.load(cache_path, mmap_mode="r")
+    except (OSError, ValueError):
+        pass
 
     # Otherwise fetch from API
     url = f"https://a.windbornesystems.com/treasure/{hours_ago:02d}.json"
-    async with httpx.AsyncClient(timeout=10) as client:
-        resp = await client.get(url)
-        resp.raise_for_status()
-        balloons = resp.json()
-
-    # Update cache (store multiple hours if fetched)
-    if CACHE_FILE.exists():
-        with open(CACHE_FILE, "r") as f:
-            cached = json.load(f)
-    else:
-        cached = {"timestamp": now, "data": {}}
-
-    cached["timestamp"] = now
-    cached["data"][str(hours_ago)] = balloons
-
-    os.makedirs(CACHE_FILE.parent, exist_ok=True)
-    with open(CACHE_FILE, "w") as f:
-        json.dump(cached, f)
+    resp = await _http.client().get(url)
+    resp.raise_for_status()
+    balloons = _rows_to_array(resp.json())
+
+    # Write to a temp file and swap it in so readers never see a partial
+    # file; the name is unique so concurrent writers don't share one
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, prefix=f"{cache_path.stem}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, balloons)
+        os.replace(tmp_path, cache_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
 
     return balloons
 
-def format_balloons(raw_balloons: List[List[float]]) -> List[Dict]:
-    """Convert raw API balloons [[lat, lon, alt], ...] into dicts."""
-    return [{"lat": b[0], "lon": b[1], "alt": b[2]} for b in raw_balloons]
+def format_balloons(raw_balloons: np.ndarray) -> List[Dict]:
+    """Convert raw balloons [[lat, lon, alt], ...] into dicts."""
+    rows = raw_balloons.tolist() if isinstance(raw_balloons, np.ndarray) else raw_balloons
+    return [{"lat": b[0], "lon": b[1], "alt": b[2]} for b in rows]
 
 # --- Enrichment: add country info using local dataset ---
 def enrich_with_country(balloons: list) -> list:
     """Enrich balloons with country information using local dataset."""
-    enriched = []
+    if not balloons:
+        return []
     
-    for balloon in balloons:
-        try:
-            # Get country for this balloon's coordinates using local dataset
-            country = get_country_for_coordinates(balloon["lat"], balloon["lon"])
-            balloon["country"] = country
-        except Exception as e:
-            print(f"Warning: Could not detect country for balloon: {e}")
-            balloon["country"] = "Unknown"
-        
-        enriched.append(balloon)
+    try:
+        # Look up all balloons in one batch using local dataset
+        countries = get_countries_for_coordinates(
+            [b["lat"] for b in balloons],
+            [b["lon"] for b in balloons]
+        )
+    except Exception as e:
+        print(f"Warning: Could not detect country for balloons: {e}")
+        countries = ["Unknown"] * len(balloons)
+    
+    for balloon, country in zip(balloons, countries):
+        balloon["country"] = country
     
-    return enriched
+    return balloons
+
+@dataclass
+class BalloonFrame:
+    """Column arrays of an enriched snapshot, indexed like the balloon list."""
+    coords: np.ndarray  # (N, 3) rows of [lat, lon, alt]
+    country_ids: np.ndarray  # indices into country_names
+    country_names: np.ndarray
+
+    @classmethod
+    def from_balloons(cls, balloons: List[Dict]) -> "BalloonFrame":
+        coords = np.array([(b["lat"], b["lon"], b["alt"]) for b in balloons], dtype=np.float64).reshape(-1, 3)
+        countries = np.array([b.get("country", "Unknown") for b in balloons], dtype=object)
+        country_names, country_ids = np.unique(countries, return_inverse=True)
+        return cls(
+            coords=coords,
+            country_ids=country_ids.astype(np.int32),
+            country_names=country_names
+        )
+
+    @classmethod
+    def from_array(cls, raw: np.ndarray) -> "BalloonFrame":
+        """Frame straight from raw [lat, lon, alt] rows, every country "Unknown"."""
+        coords = np.array(raw, dtype=np.float64).reshape(-1, 3)
+        return cls(
+            coords=coords,
+            country_ids=np.zeros(len(coords), dtype=np.int32),
+            country_names=np.array(["Unknown"], dtype=object)
+        )
+
+    @property
+    def lats(self) -> np.ndarray:
+        return self.coords[:, 0]
+
+    @property
+    def lons(self) -> np.ndarray:
+        return self.coords[:, 1]
+
+    @property
+    def alts(self) -> np.ndarray:
+        return self.coords[:, 2]
+
+    # Trig columns are computed on first use and shared by every analyzer
+    @cached_property
+    def lat_rad(self) -> np.ndarray:
+        return np.radians(self.lats)
+
+    @cached_property
+    def lon_rad(self) -> np.ndarray:
+        return np.radians(self.lons)
+
+    @cached_property
+    def cos_lat(self) -> np.ndarray:
+        return np.cos(self.lat_rad)
+
+    def __len__(self) -> int:
+        return len(self.coords)
+
+# How long a fetched snapshot is shared between tool calls (in seconds)
+SNAPSHOT_TTL = 60
+
+class BalloonDataStore:
+    """
+    Shares enriched balloon snapshots between tool calls.
+    A snapshot is fetched and enriched once, then reused until it is older
+    than the TTL. Concurrent callers for the same hour wait on one fetch.
+    get_frame(with_country=False) loads only the columns, skipping both the
+    country lookup and the per-balloon dicts. Returned lists are shared, so
+    callers must not modify them.
+    """
+
+    def __init__(self, ttl: float = SNAPSHOT_TTL):
+        self.ttl = ttl
+        self._snapshots = {}  # (hours_ago, with_country) -> (fetched_at, balloons or None, frame)
+        self._pending = {}  # (hours_ago, with_country) -> in-flight fetch task
+
+    @staticmethod
+    def _enrich(raw: List[List[float]], with_country: bool) -> tuple:
+        if not with_country:
+            return None, BalloonFrame.from_array(raw)
+        balloons = enrich_with_country(format_balloons(raw))
+        return balloons, BalloonFrame.from_balloons(balloons)
+
+    async def _load(self, key: tuple) -> tuple:
+        hours_ago, with_country = key
+        try:
+            raw = await fetch_balloons(hours_ago)
+            # Enrichment is CPU work; keep it off the loop so the other
+            # snapshot's fetch and enrichment can proceed meanwhile
+            balloons, frame = await asyncio.to_thread(self._enrich, raw, with_country)
+            snapshot = (time.monotonic(), balloons, frame)
+            self._snapshots[key] = snapshot
+            return snapshot
+        finally:
+            if self._pending.get(key) is asyncio.current_task():
+                del self._pending[key]
+
+    async def _snapshot(self, hours_ago: int, with_country: bool = True) -> tuple:
+        # An enriched snapshot also serves callers that don't need countries
+        keys = [(hours_ago, True)] if with_country else [(hours_ago, False), (hours_ago, True)]
+        for key in keys:
+            snapshot = self._snapshots.get(key)
+            if snapshot and time.monotonic() - snapshot[0] < self.ttl:
+                return snapshot
+
+        # A task can only be awaited on its own loop, so callers on another
+        # loop (e.g. a one-off asyncio.run) start their own fetch
+        key = (hours_ago, with_country)
+        loop = asyncio.get_running_loop()
+        task = self._pending.get(key)
+        if task is None or task.done() or task.get_loop() is not loop:
+            task = loop.create_task(self._load(key))
+            self._pending[key] = task
+        # Shield so a caller timing out doesn't cancel the fetch for the others
+        return await asyncio.shield(task)
+
+    async def get(self, hours_ago: int = 0) -> List[Dict]:
+        """Get enriched balloons for the given hour, fetching if stale."""
+        return (await self._snapshot(hours_ago))[1]
+
+    async def get_frame(self, hours_ago: int = 0, with_country: bool = True) -> BalloonFrame:
+        """Get the same snapshot as get() in column form (countries optional)."""
+        return (await self._snapshot(hours_ago, with_country))[2]
+
+    def fetched_at(self, hours_ago: int = 0) -> Optional[float]:
+        """When the live snapshot for the given hour was fetched, or None if there is none."""
+        times = [
+            snapshot[0] for key, snapshot in list(self._snapshots.items())
+            if key[0] == hours_ago and time.monotonic() - snapshot[0] < self.ttl
+        ]
+        return max(times, default=None)
+
+    def frame_for(self, balloons: List[Dict]) -> Optional[BalloonFrame]:
+        """Get the frame of a balloon list returned by get(), if still cached."""
+        for _, snapshot_balloons, frame in list(self._snapshots.values()):
+            if snapshot_balloons is balloons:
+                return frame
+        return None
+
+    def invalidate(self):
+        """Drop all snapshots so the next call fetches fresh data."""
+        self._snapshots.clear()
+
+balloon_store = BalloonDataStore()
 
 # --- Analytics ---
+EARTH_RADIUS_KM = 6371
+
 def highest_balloon(balloons: List[Dict]) -> Dict:
-    return max(balloons, key=lambda b: b["alt"]) if balloons else {}
+    return balloons[int(_nan_last(_balloons_to_arrays(balloons)[:, 2]).argmax())] if balloons else {}
 
 def average_altitude(balloons: List[Dict]) -> float:
-    return sum(b["alt"] for b in balloons) / len(balloons) if balloons else 0.0
+    return float(_balloons_to_arrays(balloons)[:, 2].mean()) if balloons else 0.0
 
 def calculate_speed(balloon_current: Dict, balloon_previous: Dict, time_hours: float = 1.0) -> Dict:
     """Calculate speed of a balloon between two positions."""
@@ -88,13 +267,13 @@ def calculate_speed(balloon_current: Dict, balloon_previous: Dict, time_hours: f
     
     # Calculate distance using Haversine formula for accurate Earth distance
     def haversine_distance(lat1, lon1, lat2, lon2):
-        R = 6371  # Earth's radius in kilometers
+        R = EARTH_RADIUS_KM
         dlat = math.radians(lat2 - lat1)
         dlon = math.radians(lon2 - lon1)
         a = (math.sin(dlat/2) * math.sin(dlat/2) + 
              math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * 
              math.sin(dlon/2) * math.sin(dlon/2))
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
+        c = 2 * math.asin(math.sqrt(min(a, 1.0)))
         return R * c
     
     # Calculate horizontal distance
@@ -121,6 +300,59 @@ def calculate_speed(balloon_current: Dict, balloon_previous: Dict, time_hours: f
         "altitude_change_km": round(alt_change_km, 2)
     }
 
+def _balloons_to_arrays(balloons: List[Dict]) -> np.ndarray:
+    """Pack balloon dicts into an (N, 3) array of [lat, lon, alt] rows."""
+    if isinstance(balloons, BalloonFrame):
+        return balloons.coords
+    # Store snapshots already carry their columns
+    frame = balloon_store.frame_for(balloons)
+    if frame is not None:
+        return frame.coords
+    return np.array([(b["lat"], b["lon"], b["alt"]) for b in balloons], dtype=np.float64).reshape(-1, 3)
+
+def _balloons_to_frame(balloons: List[Dict]) -> BalloonFrame:
+    """Column view of a balloon list, reusing the store's frame when there is one."""
+    if isinstance(balloons, BalloonFrame):
+        return balloons
+    frame = balloon_store.frame_for(balloons)
+    return frame if frame is not None else BalloonFrame.from_balloons(balloons)
+
+def haversine_vec(lat1_rad: np.ndarray, lon1_rad: np.ndarray, cos_lat1: np.ndarray,
+                  lat2_rad: np.ndarray, lon2_rad: np.ndarray, cos_lat2: np.ndarray) -> np.ndarray:
+    """Haversine distance in km between arrays of points given in radians, with cos(lat) precomputed."""
+    a = np.sin((lat2_rad - lat1_rad) / 2) ** 2 + cos_lat1 * cos_lat2 * np.sin((lon2_rad - lon1_rad) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+def compute_speeds_vec(balloons_current: List[Dict], balloons_previous: List[Dict], time_hours: float = 1.0) -> Dict[str, np.ndarray]:
+    """Same values as calculate_speed, as arrays over all balloon pairs."""
+    n = min(len(balloons_current), len(balloons_previous))
+    curr = _balloons_to_frame(balloons_current)
+    prev = _balloons_to_frame(balloons_previous)
+    
+    distance_km = haversine_vec(
+        prev.lat_rad[:n], prev.lon_rad[:n], prev.cos_lat[:n],
+        curr.lat_rad[:n], curr.lon_rad[:n], curr.cos_lat[:n]
+    )
+    alt_change_km = np.abs(curr.alts[:n] - prev.alts[:n]) / 1000  # Convert m to km
+    total_distance_km = np.hypot(distance_km, alt_change_km)
+    speed_kmh = total_distance_km / time_hours if time_hours > 0 else np.zeros(n)
+    
+    return {
+        "speed_kmh": np.round(speed_kmh, 2),
+        "speed_ms": np.round(speed_kmh / 3.6, 2),
+        "distance_km": np.round(total_distance_km, 2),
+        "horizontal_distance_km": np.round(distance_km, 2),
+        "altitude_change_km": np.round(alt_change_km, 2)
+    }
+
+def _speed_data(speeds: Dict[str, np.ndarray], i: int) -> Dict:
+    """calculate_speed's result for one balloon out of compute_speeds_vec."""
+    return {key: float(values[i]) for key, values in speeds.items()}
+
+def _nan_last(values: np.ndarray) -> np.ndarray:
+    """Values for largest-first ranking, with NaN (e.g. a null coordinate) below everything."""
+    return np.where(np.isnan(values), -np.inf, values)
+
 def fastest_balloon(balloons_current: List[Dict], balloons_previous: List[Dict]) -> Dict:
     """Find the fastest balloon between two time periods."""
     if not balloons_current or not balloons_previous:
@@ -128,34 +360,47 @@ def fastest_balloon(balloons_current: List[Dict], balloons_previous: List[Dict])
     
     fastest = {"speed_kmh": 0, "balloon": None, "speed_data": {}}
     
-    for i, (b_curr, b_prev) in enumerate(zip(balloons_current, balloons_previous)):
-        speed_data = calculate_speed(b_curr, b_prev)
-        if speed_data["speed_kmh"] > fastest["speed_kmh"]:
-            fastest["speed_kmh"] = speed_data["speed_kmh"]
-            fastest["balloon"] = b_curr
-            fastest["speed_data"] = speed_data
-            fastest["balloon_index"] = i
+    speeds = compute_speeds_vec(balloons_current, balloons_previous)
+    i = int(_nan_last(speeds["speed_kmh"]).argmax())
+    if speeds["speed_kmh"][i] > 0:
+        fastest["speed_kmh"] = float(speeds["speed_kmh"][i])
+        fastest["balloon"] = balloons_current[i]
+        fastest["speed_data"] = _speed_data(speeds, i)
+        fastest["balloon_index"] = i
     
     return fastest
 
-def get_balloon_speeds(balloons_current: List[Dict], balloons_previous: List[Dict]) -> List[Dict]:
-    """Get speeds for all balloons."""
+def top_k_by(values: np.ndarray, k: Optional[int] = None) -> np.ndarray:
+    """Indices of the k largest values, largest first; equal values keep index order and NaN goes last."""
+    # np.partition also sorts NaN last, which would push the k-th value up
+    # and drop candidates, so NaN input takes the full sort
+    if k is None or not 0 <= k < len(values) or np.isnan(values).any():
+        # Stable sort keeps equal values in balloon order, like sorted(reverse=True)
+        return np.argsort(-values, kind="stable")[:k]
+    if k == 0:
+        return np.empty(0, dtype=np.intp)
+    # Partition to find the k-th largest value, then sort only what reaches it
+    kth = np.partition(values, len(values) - k)[len(values) - k]
+    candidates = np.flatnonzero(values >= kth)
+    return candidates[np.argsort(-values[candidates], kind="stable")][:k]
+
+def _speed_row(balloons_current: List[Dict], speeds: Dict[str, np.ndarray], i: int) -> Dict:
+    """One balloon with its speed fields, as returned by get_balloon_speeds."""
+    return {
+        **balloons_current[i],
+        "speed_kmh": float(speeds["speed_kmh"][i]),
+        "speed_ms": float(speeds["speed_ms"][i]),
+        "distance_km": float(speeds["distance_km"][i]),
+        "balloon_index": i
+    }
+
+def get_balloon_speeds(balloons_current: List[Dict], balloons_previous: List[Dict], limit: Optional[int] = None) -> List[Dict]:
+    """Get speeds for all balloons, fastest first (only the top `limit` if given)."""
     if not balloons_current or not balloons_previous:
         return []
     
-    speeds = []
-    for i, (b_curr, b_prev) in enumerate(zip(balloons_current, balloons_previous)):
-        speed_data = calculate_speed(b_curr, b_prev)
-        balloon_with_speed = {
-            **b_curr,
-            "speed_kmh": speed_data["speed_kmh"],
-            "speed_ms": speed_data["speed_ms"],
-            "distance_km": speed_data["distance_km"],
-            "balloon_index": i
-        }
-        speeds.append(balloon_with_speed)
-    
-    return sorted(speeds, key=lambda x: x["speed_kmh"], reverse=True)
+    speeds = compute_speeds_vec(balloons_current, balloons_previous)
+    return [_speed_row(balloons_current, speeds, i) for i in top_k_by(speeds["speed_kmh"], limit).tolist()]
 
 def fastest_balloons_by_country(balloons_current: List[Dict], balloons_previous: List[Dict]) -> Dict:
     """Get fastest balloon in each country."""
@@ -173,24 +418,32 @@ def fastest_balloons_by_country(balloons_current: List[Dict], balloons_previous:
     return country_fastest
 
 # --- Async wrappers for agent ---
+async def _fetch_curr_prev():
+    """Load the current and previous hour snapshots concurrently."""
+    # Only positions are read from the previous hour, so it stays a frame
+    return await asyncio.gather(balloon_store.get(0), balloon_store.get_frame(1, with_country=False))
+
 async def highest_balloon_tool():
-    balloons = format_balloons(await fetch_balloons(0))
-    enriched = enrich_with_country(balloons)
-    return highest_balloon(enriched)
+    return highest_balloon(await balloon_store.get(0))
 
 async def average_altitude_tool():
-    balloons = format_balloons(await fetch_balloons(0))
-    return average_altitude(enrich_with_country(balloons))
+    return average_altitude(await balloon_store.get(0))
 
 async def fastest_balloon_tool():
-    curr = format_balloons(await fetch_balloons(0))
-    prev = format_balloons(await fetch_balloons(1))
-    return fastest_balloon(enrich_with_country(curr), enrich_with_country(prev))
+    curr, prev = await _fetch_curr_prev()
+    return fastest_balloon(curr, prev)
+
+def balloons_in_country(balloons: List[Dict], country: str) -> List[Dict]:
+    """Balloons whose country matches the given name (case insensitive)."""
+    # Match the name against the frame's few distinct countries, then select
+    # balloons by country id instead of comparing every balloon's string
+    frame = _balloons_to_frame(balloons)
+    country = country.lower()
+    wanted = [i for i, name in enumerate(frame.country_names) if name.lower() == country]
+    return [balloons[i] for i in np.flatnonzero(np.isin(frame.country_ids, wanted)).tolist()]
 
 async def balloons_in_country_tool(country: str):
-    balloons = format_balloons(await fetch_balloons(0))
-    enriched = enrich_with_country(balloons)
-    return [b for b in enriched if b["country"].lower() == country.lower()]
+    return balloons_in_country(await balloon_store.get(0), country)
 
 async def visited_countries_tool(balloon_id: str) -> list:
     """
@@ -199,8 +452,7 @@ async def visited_countries_tool(balloon_id: str) -> list:
     """
     try:
         # Get current balloons
-        balloons = format_balloons(await fetch_balloons(0))
-        enriched = enrich_with_country(balloons)
+        enriched = await balloon_store.get(0)
         
         # Find the balloon by ID (assuming balloon_id is an index)
         if balloon_id.isdigit():
@@ -216,8 +468,7 @@ async def visited_countries_tool(balloon_id: str) -> list:
 async def balloons_by_country_tool():
     """Get count of balloons by country."""
     try:
-        balloons = format_balloons(await fetch_balloons(0))
-        enriched = enrich_with_country(balloons)
+        enriched = await balloon_store.get(0)
         
         country_counts = {}
         for balloon in enriched:
@@ -241,11 +492,10 @@ async def balloons_by_country_tool():
 async def balloons_in_specific_country_tool(country_name: str):
     """Get balloons in a specific country."""
     try:
-        balloons = format_balloons(await fetch_balloons(0))
-        enriched = enrich_with_country(balloons)
+        enriched = await balloon_store.get(0)
         
         # Filter by country (case insensitive)
-        country_balloons = [b for b in enriched if b.get("country", "").lower() == country_name.lower()]
+        country_balloons = balloons_in_country(enriched, country_name)
         
         return {
             "country": country_name,
@@ -258,28 +508,27 @@ async def balloons_in_specific_country_tool(country_name: str):
 
 async def fetch_hurricanes(_=None):
     url = "https://www.nhc.noaa.gov/CurrentStorms.json"
-    async with httpx.AsyncClient(timeout=10) as client:
-        resp = await client.get(url)
-        resp.raise_for_status()
-        storms = resp.json().get("storms", [])
+    client = _http.client()
+    resp = await client.get(url)
+    resp.raise_for_status()
+    storms = resp.json().get("storms", [])
+
+    # Example: Each storm may have a 'advisoryURL' or 'trackURL'
+    storms = [s for s in storms if s.get("advisoryURL")]
+    adv_resps = await asyncio.gather(*(client.get(s["advisoryURL"]) for s in storms))
 
     detailed_list = []
-    for s in storms:
-        # Example: Each storm may have a 'advisoryURL' or 'trackURL'
-        adv_url = s.get("advisoryURL")
-        if adv_url:
-            async with httpx.AsyncClient(timeout=10) as client:
-                adv_resp = await client.get(adv_url)
-                # Parse JSON or XML depending on API
-                adv_data = adv_resp.json()
-                detailed_list.append({
-                    "name": s.get("name"),
-                    "basin": s.get("basin"),
-                    "lat": adv_data.get("latitude"),
-                    "lon": adv_data.get("longitude"),
-                    "advisory": adv_data.get("advisory_number"),
-                    # more fields as needed
-                })
+    for s, adv_resp in zip(storms, adv_resps):
+        # Parse JSON or XML depending on API
+        adv_data = adv_resp.json()
+        detailed_list.append({
+            "name": s.get("name"),
+            "basin": s.get("basin"),
+            "lat": adv_data.get("latitude"),
+            "lon": adv_data.get("longitude"),
+            "advisory": adv_data.get("advisory_number"),
+            # more fields as needed
+        })
     return detailed_list
 
 async def fastest_balloon_last2h_tool(*args, **kwargs):
@@ -287,146 +536,114 @@ async def fastest_balloon_last2h_tool(*args, **kwargs):
     Returns the balloon that moved the fastest between the last 2 hours.
     Accepts dummy positional arguments because LangChain always passes one.
     """
-    curr = format_balloons(await fetch_balloons(0))
-    prev = format_balloons(await fetch_balloons(1))
+    curr, prev = await _fetch_curr_prev()
     return fastest_balloon(curr, prev)
 
 async def get_all_balloon_speeds_tool():
     """Get speeds for all balloons in the last hour."""
-    curr = format_balloons(await fetch_balloons(0))
-    prev = format_balloons(await fetch_balloons(1))
-    enriched_curr = enrich_with_country(curr)
-    enriched_prev = enrich_with_country(prev)
+    enriched_curr, enriched_prev = await _fetch_curr_prev()
     return get_balloon_speeds(enriched_curr, enriched_prev)
 
 async def fastest_balloons_by_country_tool():
     """Get the fastest balloon in each country."""
-    curr = format_balloons(await fetch_balloons(0))
-    prev = format_balloons(await fetch_balloons(1))
-    enriched_curr = enrich_with_country(curr)
-    enriched_prev = enrich_with_country(prev)
+    enriched_curr, enriched_prev = await _fetch_curr_prev()
     return fastest_balloons_by_country(enriched_curr, enriched_prev)
 
 async def top_fastest_balloons_tool(limit=10):
     """Get the top N fastest balloons."""
-    curr = format_balloons(await fetch_balloons(0))
-    prev = format_balloons(await fetch_balloons(1))
-    enriched_curr = enrich_with_country(curr)
-    enriched_prev = enrich_with_country(prev)
-    speeds = get_balloon_speeds(enriched_curr, enriched_prev)
-    return speeds[:limit]
+    enriched_curr, enriched_prev = await _fetch_curr_prev()
+    return get_balloon_speeds(enriched_curr, enriched_prev, limit)
 
 async def balloon_speed_analysis_tool():
     """Get comprehensive speed analysis including statistics."""
-    curr = format_balloons(await fetch_balloons(0))
-    prev = format_balloons(await fetch_balloons(1))
-    enriched_curr = enrich_with_country(curr)
-    enriched_prev = enrich_with_country(prev)
-    speeds = get_balloon_speeds(enriched_curr, enriched_prev)
+    enriched_curr, enriched_prev = await _fetch_curr_prev()
     
-    if not speeds:
+    if not enriched_curr or not enriched_prev:
         return {"error": "No speed data available"}
     
-    speed_values = [b["speed_kmh"] for b in speeds]
+    speeds = compute_speeds_vec(enriched_curr, enriched_prev)
+    speed_values = speeds["speed_kmh"]
+    top_5 = [_speed_row(enriched_curr, speeds, i) for i in top_k_by(speed_values, 5).tolist()]
+    # The slowest balloon, latest in order among ties, skipping NaN speeds
+    slowest = len(speed_values) - 1 - int(np.where(np.isnan(speed_values), np.inf, speed_values)[::-1].argmin())
     
     analysis = {
-        "total_balloons": len(speeds),
-        "fastest_balloon": speeds[0] if speeds else None,
-        "slowest_balloon": speeds[-1] if speeds else None,
-        "average_speed_kmh": round(sum(speed_values) / len(speed_values), 2),
-        "max_speed_kmh": max(speed_values),
-        "min_speed_kmh": min(speed_values),
-        "top_5_fastest": speeds[:5],
-        "countries_with_balloons": len(set(b.get("country", "Unknown") for b in speeds))
+        "total_balloons": len(speed_values),
+        "fastest_balloon": top_5[0],
+        "slowest_balloon": _speed_row(enriched_curr, speeds, slowest),
+        "average_speed_kmh": round(float(speed_values.mean()), 2),
+        "max_speed_kmh": float(speed_values.max()),
+        "min_speed_kmh": float(speed_values.min()),
+        "top_5_fastest": top_5,
+        "countries_with_balloons": len(set(b.get("country", "Unknown") for b in enriched_curr[:len(speed_values)]))
     }
     
     return analysis
 
 async def most_distance_covered_tool():
     """Get the balloon that has covered the most distance in the last hour."""
-    curr = format_balloons(await fetch_balloons(0))
-    prev = format_balloons(await fetch_balloons(1))
-    enriched_curr = enrich_with_country(curr)
-    enriched_prev = enrich_with_country(prev)
+    enriched_curr, enriched_prev = await _fetch_curr_prev()
     
     if not enriched_curr or not enriched_prev:
         return {"error": "No data available for distance calculation"}
     
-    max_distance = 0
+    distances = compute_speeds_vec(enriched_curr, enriched_prev)["distance_km"]
+    i = int(_nan_last(distances).argmax())
     most_traveled_balloon = None
-    
-    for i, (b_curr, b_prev) in enumerate(zip(enriched_curr, enriched_prev)):
-        speed_data = calculate_speed(b_curr, b_prev)
-        distance = speed_data["distance_km"]
-        
-        if distance > max_distance:
-            max_distance = distance
-            most_traveled_balloon = {
-                **b_curr,
-                "distance_covered_km": distance,
-                "balloon_index": i
-            }
+    if distances[i] > 0:
+        most_traveled_balloon = {
+            **enriched_curr[i],
+            "distance_covered_km": float(distances[i]),
+            "balloon_index": i
+        }
     
     return most_traveled_balloon or {"error": "No balloons found"}
 
 async def distance_rankings_tool():
     """Get all balloons ranked by distance covered in the last hour."""
-    curr = format_balloons(await fetch_balloons(0))
-    prev = format_balloons(await fetch_balloons(1))
-    enriched_curr = enrich_with_country(curr)
-    enriched_prev = enrich_with_country(prev)
+    enriched_curr, enriched_prev = await _fetch_curr_prev()
     
     if not enriched_curr or not enriched_prev:
         return []
     
-    distances = []
-    for i, (b_curr, b_prev) in enumerate(zip(enriched_curr, enriched_prev)):
-        speed_data = calculate_speed(b_curr, b_prev)
-        balloon_with_distance = {
-            **b_curr,
-            "distance_covered_km": speed_data["distance_km"],
+    distances = compute_speeds_vec(enriched_curr, enriched_prev)["distance_km"]
+    order = np.argsort(-distances, kind="stable").tolist()
+    distances = distances.tolist()
+    return [
+        {
+            **enriched_curr[i],
+            "distance_covered_km": distances[i],
             "balloon_index": i
         }
-        distances.append(balloon_with_distance)
-    
-    return sorted(distances, key=lambda x: x["distance_covered_km"], reverse=True)
+        for i in order
+    ]
 
 # --- Weather Analysis Async Wrappers ---
 
 async def wind_analysis_tool():
     """Analyze wind patterns and directions across all balloons."""
-    curr = format_balloons(await fetch_balloons(0))
-    prev = format_balloons(await fetch_balloons(1))
-    enriched_curr = enrich_with_country(curr)
-    enriched_prev = enrich_with_country(prev)
+    enriched_curr, enriched_prev = await _fetch_curr_prev()
     return analyze_wind_patterns(enriched_curr, enriched_prev)
 
 async def atmospheric_anomalies_tool():
     """Detect atmospheric anomalies from balloon behavior patterns."""
-    curr = format_balloons(await fetch_balloons(0))
-    prev = format_balloons(await fetch_balloons(1))
-    enriched_curr = enrich_with_country(curr)
-    enriched_prev = enrich_with_country(prev)
+    enriched_curr, enriched_prev = await _fetch_curr_prev()
     return detect_atmospheric_anomalies(enriched_curr, enriched_prev)
 
 async def weather_fronts_tool():
     """Detect potential weather fronts based on balloon movement patterns."""
-    curr = format_balloons(await fetch_balloons(0))
-    prev = format_balloons(await fetch_balloons(1))
-    enriched_curr = enrich_with_country(curr)
-    enriched_prev = enrich_with_country(prev)
+    enriched_curr, enriched_prev = await _fetch_curr_prev()
     return detect_weather_fronts(enriched_curr, enriched_prev)
 
 async def comprehensive_weather_analysis_tool():
     """Get comprehensive weather analysis including wind patterns, anomalies, and fronts."""
-    curr = format_balloons(await fetch_balloons(0))
-    prev = format_balloons(await fetch_balloons(1))
-    enriched_curr = enrich_with_country(curr)
-    enriched_prev = enrich_with_country(prev)
+    enriched_curr, enriched_prev = await _fetch_curr_prev()
     
-    wind_analysis = analyze_wind_patterns(enriched_curr, enriched_prev)
-    anomaly_analysis = detect_atmospheric_anomalies(enriched_curr, enriched_prev)
-    front_analysis = detect_weather_fronts(enriched_curr, enriched_prev)
+    # Every analyzer reads the same speeds and wind vectors
+    dynamics = compute_balloon_dynamics(enriched_curr, enriched_prev)
+    wind_analysis = analyze_wind_patterns(enriched_curr, enriched_prev, dynamics)
+    anomaly_analysis = detect_atmospheric_anomalies(enriched_curr, enriched_prev, dynamics)
+    front_analysis = detect_weather_fronts(enriched_curr, enriched_prev, dynamics)
     
     return {
         "timestamp": "Current",
@@ -443,6 +660,22 @@ async def comprehensive_weather_analysis_tool():
 
 # --- Weather Analysis Tools ---
 
+# 16-point compass, each sector 22.5 degrees wide and centered on its bearing
+CARDINAL_DIRECTIONS = ["N", "NNE", "NE", "ENE", "E", "ESE", "SE", "SSE",
+                       "S", "SSW", "SW", "WSW", "W", "WNW", "NW", "NNW"]
+CARDINAL_ARRAY = np.array(CARDINAL_DIRECTIONS, dtype=object)
+
+def cardinal_sectors(wind_direction_deg: np.ndarray) -> np.ndarray:
+    """Index into CARDINAL_DIRECTIONS for an array of bearings in [0, 360)."""
+    return ((wind_direction_deg + 11.25) / 22.5).astype(np.intp) % 16
+
+def circular_std_deg(wind_direction_deg: np.ndarray) -> float:
+    """Yamartino estimate of the spread of bearings in degrees, aware of the 0/360 wrap."""
+    theta = np.radians(wind_direction_deg)
+    mean_sin, mean_cos = np.sin(theta).mean(), np.cos(theta).mean()
+    eps = math.sqrt(max(0.0, 1 - (mean_sin**2 + mean_cos**2)))
+    return math.degrees(math.asin(eps) * (1 + 0.1547 * eps**3))
+
 def calculate_wind_vector(balloon_current: Dict, balloon_previous: Dict, time_hours: float = 1.0) -> Dict:
     """Calculate wind vector from balloon movement."""
     if not balloon_current or not balloon_previous:
@@ -465,9 +698,7 @@ def calculate_wind_vector(balloon_current: Dict, balloon_previous: Dict, time_ho
         wind_direction_deg += 360
     
     # Convert to cardinal direction
-    directions = ["N", "NNE", "NE", "ENE", "E", "ESE", "SE", "SSE", 
-                 "S", "SSW", "SW", "WSW", "W", "WNW", "NW", "NNW"]
-    wind_direction_cardinal = directions[int((wind_direction_deg + 11.25) / 22.5) % 16]
+    wind_direction_cardinal = CARDINAL_DIRECTIONS[int((wind_direction_deg + 11.25) / 22.5) % 16]
     
     return {
         "wind_speed_kmh": round(wind_speed_kmh, 2),
@@ -477,63 +708,92 @@ def calculate_wind_vector(balloon_current: Dict, balloon_previous: Dict, time_ho
         "displacement_lon_km": round(lon_km, 2)
     }
 
-def detect_atmospheric_anomalies(balloons_current: List[Dict], balloons_previous: List[Dict]) -> Dict:
+def compute_wind_vectors_vec(balloons_current: List[Dict], balloons_previous: List[Dict], time_hours: float = 1.0) -> Dict[str, np.ndarray]:
+    """Same values as calculate_wind_vector, as arrays over all balloon pairs."""
+    n = min(len(balloons_current), len(balloons_previous))
+    curr = _balloons_to_frame(balloons_current)
+    prev = _balloons_to_frame(balloons_previous)
+    
+    dlat = curr.lats[:n] - prev.lats[:n]
+    dlon = curr.lons[:n] - prev.lons[:n]
+    lat_km = dlat * 111.32  # 1 degree latitude ≈ 111.32 km
+    lon_km = dlon * 111.32 * curr.cos_lat[:n]
+    wind_speed_kmh = np.sqrt(lat_km**2 + lon_km**2) / time_hours
+    
+    # Bearing from previous to current position, in [0, 360)
+    wind_direction_deg = np.degrees(np.arctan2(dlon, dlat))
+    wind_direction_deg[wind_direction_deg < 0] += 360
+    
+    return {
+        "wind_speed_kmh": np.round(wind_speed_kmh, 2),
+        "wind_direction_deg": np.round(wind_direction_deg, 1),
+        "wind_direction_cardinal": CARDINAL_ARRAY[cardinal_sectors(wind_direction_deg)],
+        "displacement_lat_km": np.round(lat_km, 2),
+        "displacement_lon_km": np.round(lon_km, 2)
+    }
+
+def _wind_rows(winds: Dict[str, np.ndarray]) -> List[Dict]:
+    """calculate_wind_vector's result per balloon out of compute_wind_vectors_vec."""
+    columns = {key: values.tolist() for key, values in winds.items()}
+    return [dict(zip(columns, row)) for row in zip(*columns.values())]
+
+def compute_balloon_dynamics(balloons_current: List[Dict], balloons_previous: List[Dict]) -> Dict:
+    """Speeds and wind vectors for all balloon pairs, computed once for every analyzer."""
+    winds = compute_wind_vectors_vec(balloons_current, balloons_previous)
+    return {
+        "speeds": compute_speeds_vec(balloons_current, balloons_previous),
+        "winds": winds,
+        "wind_rows": _wind_rows(winds)
+    }
+
+def detect_atmospheric_anomalies(balloons_current: List[Dict], balloons_previous: List[Dict], dynamics: Optional[Dict] = None) -> Dict:
     """Detect atmospheric anomalies from balloon behavior patterns."""
     if not balloons_current or not balloons_previous:
         return {"error": "No data available for anomaly detection"}
     
     anomalies = []
     
-    # Calculate statistics for comparison
-    current_speeds = []
-    current_altitudes = []
-    wind_vectors = []
-    
-    for b_curr, b_prev in zip(balloons_current, balloons_previous):
-        speed_data = calculate_speed(b_curr, b_prev)
-        wind_data = calculate_wind_vector(b_curr, b_prev)
-        
-        current_speeds.append(speed_data["speed_kmh"])
-        current_altitudes.append(b_curr["alt"])
-        wind_vectors.append(wind_data["wind_speed_kmh"])
+    if dynamics is None:
+        dynamics = compute_balloon_dynamics(balloons_current, balloons_previous)
+    current_speeds = dynamics["speeds"]["speed_kmh"]
+    wind_speeds = dynamics["winds"]["wind_speed_kmh"]
+    wind_cardinals = dynamics["winds"]["wind_direction_cardinal"]
+    current_altitudes = _balloons_to_arrays(balloons_current)[:len(current_speeds), 2]
     
     # Calculate thresholds for anomaly detection
-    avg_speed = sum(current_speeds) / len(current_speeds)
-    avg_altitude = sum(current_altitudes) / len(current_altitudes)
-    avg_wind = sum(wind_vectors) / len(wind_vectors)
-    
-    speed_std = math.sqrt(sum((s - avg_speed)**2 for s in current_speeds) / len(current_speeds))
-    altitude_std = math.sqrt(sum((a - avg_altitude)**2 for a in current_altitudes) / len(current_altitudes))
-    
-    # Detect anomalies
-    for i, (b_curr, b_prev) in enumerate(zip(balloons_current, balloons_previous)):
-        speed_data = calculate_speed(b_curr, b_prev)
-        wind_data = calculate_wind_vector(b_curr, b_prev)
+    avg_speed, speed_std = float(current_speeds.mean()), float(current_speeds.std())
+    avg_altitude, altitude_std = float(current_altitudes.mean()), float(current_altitudes.std())
+    avg_wind, wind_std = float(wind_speeds.mean()), float(wind_speeds.std())
+    
+    # Speed and wind anomalies sit 2 standard deviations above the mean,
+    # altitude anomalies 2 standard deviations either side
+    high_speed = current_speeds > avg_speed + 2 * speed_std
+    odd_altitude = np.abs(current_altitudes - avg_altitude) > 2 * altitude_std
+    high_wind = wind_speeds > avg_wind + 2 * wind_std
+    
+    # Only anomalous balloons are turned back into dicts
+    for i in np.flatnonzero(high_speed | odd_altitude | high_wind).tolist():
+        b_curr = balloons_current[i]
+        speed_kmh = float(current_speeds[i])
+        wind_speed_kmh = float(wind_speeds[i])
         
         balloon_anomalies = []
-        
-        # Speed anomaly (2 standard deviations above mean)
-        if speed_data["speed_kmh"] > avg_speed + 2 * speed_std:
-            balloon_anomalies.append(f"High speed anomaly: {speed_data['speed_kmh']:.1f} km/h")
-        
-        # Altitude anomaly
-        if abs(b_curr["alt"] - avg_altitude) > 2 * altitude_std:
+        if high_speed[i]:
+            balloon_anomalies.append(f"High speed anomaly: {speed_kmh:.1f} km/h")
+        if odd_altitude[i]:
             balloon_anomalies.append(f"Altitude anomaly: {b_curr['alt']:.0f}m (avg: {avg_altitude:.0f}m)")
+        if high_wind[i]:
+            balloon_anomalies.append(f"High wind anomaly: {wind_speed_kmh:.1f} km/h")
         
-        # Wind anomaly
-        if wind_data["wind_speed_kmh"] > avg_wind + 2 * math.sqrt(sum((w - avg_wind)**2 for w in wind_vectors) / len(wind_vectors)):
-            balloon_anomalies.append(f"High wind anomaly: {wind_data['wind_speed_kmh']:.1f} km/h")
-        
-        if balloon_anomalies:
-            anomalies.append({
-                "balloon_index": i,
-                "position": {"lat": b_curr["lat"], "lon": b_curr["lon"], "alt": b_curr["alt"]},
-                "country": b_curr.get("country", "Unknown"),
-                "anomalies": balloon_anomalies,
-                "speed_kmh": speed_data["speed_kmh"],
-                "wind_speed_kmh": wind_data["wind_speed_kmh"],
-                "wind_direction": wind_data["wind_direction_cardinal"]
-            })
+        anomalies.append({
+            "balloon_index": i,
+            "position": {"lat": b_curr["lat"], "lon": b_curr["lon"], "alt": b_curr["alt"]},
+            "country": b_curr.get("country", "Unknown"),
+            "anomalies": balloon_anomalies,
+            "speed_kmh": speed_kmh,
+            "wind_speed_kmh": wind_speed_kmh,
+            "wind_direction": wind_cardinals[i]
+        })
     
     return {
         "total_balloons": len(balloons_current),
@@ -545,126 +805,121 @@ def detect_atmospheric_anomalies(balloons_current: List[Dict], balloons_previous
         "anomalous_balloons": anomalies
     }
 
-def analyze_wind_patterns(balloons_current: List[Dict], balloons_previous: List[Dict]) -> Dict:
+def analyze_wind_patterns(balloons_current: List[Dict], balloons_previous: List[Dict], dynamics: Optional[Dict] = None) -> Dict:
     """Analyze wind patterns across different regions."""
     if not balloons_current or not balloons_previous:
         return {"error": "No data available for wind analysis"}
     
     wind_data = []
-    country_winds = {}
+    country_indices = {}
     
-    for b_curr, b_prev in zip(balloons_current, balloons_previous):
-        wind_vector = calculate_wind_vector(b_curr, b_prev)
+    if dynamics is not None:
+        winds, rows = dynamics["winds"], dynamics["wind_rows"]
+    else:
+        winds = compute_wind_vectors_vec(balloons_current, balloons_previous)
+        rows = _wind_rows(winds)
+    for i, (b_curr, wind_vector) in enumerate(zip(balloons_current, rows)):
         country = b_curr.get("country", "Unknown")
         
-        wind_info = {
+        wind_data.append({
             **wind_vector,
             "country": country,
             "altitude": b_curr["alt"],
             "position": {"lat": b_curr["lat"], "lon": b_curr["lon"]}
-        }
-        wind_data.append(wind_info)
+        })
         
         # Group by country
-        if country not in country_winds:
-            country_winds[country] = []
-        country_winds[country].append(wind_info)
+        country_indices.setdefault(country, []).append(i)
+    
+    all_wind_speeds = winds["wind_speed_kmh"]
+    all_directions = winds["wind_direction_deg"]
+    # Sectors of the rounded bearings reported in wind_data
+    all_sectors = cardinal_sectors(all_directions)
     
     # Analyze wind patterns by country
     country_analysis = {}
-    for country, winds in country_winds.items():
-        if len(winds) > 0:
-            avg_wind_speed = sum(w["wind_speed_kmh"] for w in winds) / len(winds)
-            wind_directions = [w["wind_direction_deg"] for w in winds]
-            
-            # Calculate dominant wind direction
-            direction_counts = {}
-            for direction in wind_directions:
-                cardinal = directions[int((direction + 11.25) / 22.5) % 16]
-                direction_counts[cardinal] = direction_counts.get(cardinal, 0) + 1
-            
-            dominant_direction = max(direction_counts, key=direction_counts.get) if direction_counts else "Variable"
-            
-            country_analysis[country] = {
-                "balloon_count": len(winds),
-                "average_wind_speed_kmh": round(avg_wind_speed, 2),
-                "dominant_direction": dominant_direction,
-                "wind_direction_variance": round(math.sqrt(sum((d - sum(wind_directions)/len(wind_directions))**2 for d in wind_directions) / len(wind_directions)), 1)
-            }
+    for country, indices in country_indices.items():
+        wind_speeds = all_wind_speeds[indices]
+        wind_directions = all_directions[indices]
+        sectors = all_sectors[indices]
+        
+        # Dominant wind direction; ties go to the sector seen first
+        counts = np.bincount(sectors, minlength=16)
+        tied = np.flatnonzero(counts == counts.max())
+        dominant_direction = CARDINAL_DIRECTIONS[sectors[np.isin(sectors, tied).argmax()]]
+        
+        country_analysis[country] = {
+            "balloon_count": len(indices),
+            "average_wind_speed_kmh": round(float(wind_speeds.mean()), 2),
+            "dominant_direction": dominant_direction,
+            "wind_direction_variance": round(circular_std_deg(wind_directions), 1)
+        }
     
     # Global wind analysis
-    all_wind_speeds = [w["wind_speed_kmh"] for w in wind_data]
-    all_directions = [w["wind_direction_deg"] for w in wind_data]
-    
     return {
         "global_analysis": {
             "total_balloons": len(wind_data),
-            "average_wind_speed_kmh": round(sum(all_wind_speeds) / len(all_wind_speeds), 2),
-            "max_wind_speed_kmh": round(max(all_wind_speeds), 2),
-            "min_wind_speed_kmh": round(min(all_wind_speeds), 2),
-            "wind_direction_variance": round(math.sqrt(sum((d - sum(all_directions)/len(all_directions))**2 for d in all_directions) / len(all_directions)), 1)
+            "average_wind_speed_kmh": round(float(all_wind_speeds.mean()), 2),
+            "max_wind_speed_kmh": round(float(all_wind_speeds.max()), 2),
+            "min_wind_speed_kmh": round(float(all_wind_speeds.min()), 2),
+            "wind_direction_variance": round(circular_std_deg(all_directions), 1)
         },
         "country_analysis": country_analysis,
         "wind_data": wind_data
     }
 
-def detect_weather_fronts(balloons_current: List[Dict], balloons_previous: List[Dict]) -> Dict:
+# Regions checked for fronts as (lat_min, lat_max, lon_min, lon_max); a balloon
+# inside several boxes belongs to the first one listed
+FRONT_REGIONS = {
+    "north_america": (15, 70, -170, -50),
+    "europe": (35, 70, -10, 40),
+    "asia": (10, 60, 60, 180),
+    "south_america": (-60, 15, -90, -30),
+    "africa": (-40, 40, -20, 60),
+    "oceania": (-50, 0, 110, 180)
+}
+
+def detect_weather_fronts(balloons_current: List[Dict], balloons_previous: List[Dict], dynamics: Optional[Dict] = None) -> Dict:
     """Detect potential weather fronts based on balloon movement patterns."""
     if not balloons_current or not balloons_previous:
         return {"error": "No data available for front detection"}
     
-    # Group balloons by geographic regions
-    regions = {
-        "north_america": [],
-        "europe": [],
-        "asia": [],
-        "south_america": [],
-        "africa": [],
-        "oceania": []
-    }
+    if dynamics is not None:
+        winds = dynamics["winds"]
+    else:
+        winds = compute_wind_vectors_vec(balloons_current, balloons_previous)
+    all_wind_speeds = winds["wind_speed_kmh"]
+    all_directions = winds["wind_direction_deg"]
     
-    for b_curr, b_prev in zip(balloons_current, balloons_previous):
-        lat, lon = b_curr["lat"], b_curr["lon"]
-        wind_data = calculate_wind_vector(b_curr, b_prev)
-        
-        balloon_info = {
-            "position": {"lat": lat, "lon": lon, "alt": b_curr["alt"]},
-            "wind": wind_data,
-            "country": b_curr.get("country", "Unknown")
-        }
-        
-        # Categorize by region
-        if 15 <= lat <= 70 and -170 <= lon <= -50:
-            regions["north_america"].append(balloon_info)
-        elif 35 <= lat <= 70 and -10 <= lon <= 40:
-            regions["europe"].append(balloon_info)
-        elif 10 <= lat <= 60 and 60 <= lon <= 180:
-            regions["asia"].append(balloon_info)
-        elif -60 <= lat <= 15 and -90 <= lon <= -30:
-            regions["south_america"].append(balloon_info)
-        elif -40 <= lat <= 40 and -20 <= lon <= 60:
-            regions["africa"].append(balloon_info)
-        elif -50 <= lat <= 0 and 110 <= lon <= 180:
-            regions["oceania"].append(balloon_info)
+    # Group balloons by geographic regions
+    frame = _balloons_to_frame(balloons_current)
+    lat, lon = frame.lats[:len(all_wind_speeds)], frame.lons[:len(all_wind_speeds)]
+    region_masks = [
+        (lat_min <= lat) & (lat <= lat_max) & (lon_min <= lon) & (lon <= lon_max)
+        for lat_min, lat_max, lon_min, lon_max in FRONT_REGIONS.values()
+    ]
+    region_ids = np.select(region_masks, np.arange(len(FRONT_REGIONS)), default=-1)
     
     # Analyze each region for front-like patterns
     front_analysis = {}
-    for region, balloons in regions.items():
-        if len(balloons) < 2:
+    for region_id, region in enumerate(FRONT_REGIONS):
+        in_region = region_ids == region_id
+        balloon_count = int(np.count_nonzero(in_region))
+        if balloon_count < 2:
             continue
             
-        wind_speeds = [b["wind"]["wind_speed_kmh"] for b in balloons]
-        wind_directions = [b["wind"]["wind_direction_deg"] for b in balloons]
+        wind_speeds = all_wind_speeds[in_region]
+        wind_directions = all_directions[in_region]
         
         # Look for significant wind speed changes (potential fronts)
-        speed_variance = math.sqrt(sum((s - sum(wind_speeds)/len(wind_speeds))**2 for s in wind_speeds) / len(wind_speeds))
-        avg_speed = sum(wind_speeds) / len(wind_speeds)
+        speed_variance = float(wind_speeds.std())
+        avg_speed = float(wind_speeds.mean())
         
         # Look for wind direction convergence/divergence
-        direction_variance = math.sqrt(sum((d - sum(wind_directions)/len(wind_directions))**2 for d in wind_directions) / len(wind_directions))
+        direction_variance = circular_std_deg(wind_directions)
         
         front_analysis[region] = {
-            "balloon_count": len(balloons),
+            "balloon_count": balloon_count,
             "average_wind_speed_kmh": round(avg_speed, 2),
             "wind_speed_variance": round(speed_variance, 2),
             "wind_direction_variance": round(direction_variance, 1),
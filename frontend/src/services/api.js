@@ -43,11 +43,25 @@ api.interceptors.response.use(
   }
 );
 
+// Identifies this browser tab's chat so the backend keeps a separate history
+const getSessionId = () => {
+  let sessionId = sessionStorage.getItem('chatSessionId');
+  if (!sessionId) {
+    // randomUUID only exists in secure contexts (HTTPS or localhost);
+    // getRandomValues also works when the app is served over plain HTTP
+    sessionId = typeof crypto.randomUUID === 'function'
+      ? crypto.randomUUID()
+      : Array.from(crypto.getRandomValues(new Uint8Array(16)), (b) => b.toString(16).padStart(2, '0')).join('');
+    sessionStorage.setItem('chatSessionId', sessionId);
+  }
+  return sessionId;
+};
+
 export const balloonAPI = {
   // Ask the agent a question
   askQuestion: async (question) => {
     try {
-      const response = await api.post('/ask', { question });
+      const response = await api.post('/ask', { question, session_id: getSessionId() });
       return response.data;
     } catch (error) {
       throw new Error(error.response?.data?.detail || 'Failed to get response from agent');